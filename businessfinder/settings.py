@@ -1,24 +1,36 @@
 # businessfinder/settings.py
 from pathlib import Path
 import os
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Load env in correct priority:
-# 1) .env.local (development)
-# 2) .env (production)
-load_dotenv(BASE_DIR / ".env.local")
-load_dotenv(BASE_DIR / ".env")  # won't override existing vars by default
+# Read each env file once. Priority (highest first):
+# 1) real process environment
+# 2) .env.local (development)
+# 3) .env (production)
+_ENV = {
+    k: v
+    for source in (dotenv_values(BASE_DIR / ".env"), dotenv_values(BASE_DIR / ".env.local"), os.environ)
+    for k, v in source.items()
+    if v is not None
+}
+
+# Modules that still read os.environ (views, services/osm) see the file values too
+for _k, _v in _ENV.items():
+    os.environ.setdefault(_k, _v)
+
+def _get(name: str, default=None):
+    return _ENV.get(name, default)
 
 def env_bool(name: str, default: str = "0") -> bool:
-    return os.getenv(name, default).strip() in ("1", "true", "True", "yes", "YES")
+    return _get(name, default).strip() in ("1", "true", "True", "yes", "YES")
 
 def env_list(name: str):
-    raw = os.getenv(name, "")
+    raw = _get(name, "")
     return [x.strip() for x in raw.split(",") if x.strip()]
 
-SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "unsafe-dev-secret")
+SECRET_KEY = _get("DJANGO_SECRET_KEY", "unsafe-dev-secret")
 DEBUG = env_bool("DJANGO_DEBUG", "0")
 
 ALLOWED_HOSTS = env_list("DJANGO_ALLOWED_HOSTS")
@@ -55,13 +67,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # right after SecurityMiddleware so static hits skip sessions/CSRF/auth
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
 ]
 
 ROOT_URLCONF = "businessfinder.urls"
@@ -86,10 +99,26 @@ WSGI_APPLICATION = "businessfinder.wsgi.application"
 # -------------------------------------------------
 # Database (SQLite for now)
 # -------------------------------------------------
+# WAL lets readers stop blocking on the writer, but it is persistent in the DB
+# file and adds -wal/-shm sidecars, so it's opt-in per deployment rather than
+# switched on for every checkout of the tracked db.sqlite3.
+# NORMAL sync is only safe together with WAL.
+SQLITE_WAL = env_bool("DJANGO_SQLITE_WAL", "0")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # keep connections open between requests instead of reconnecting each time
+        "CONN_MAX_AGE": int(_get("DJANGO_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": (
+                ("PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;" if SQLITE_WAL else "")
+                + "PRAGMA mmap_size=134217728;"
+                "PRAGMA cache_size=-64000;"
+            ),
+        },
     }
 }
 
@@ -121,14 +150,10 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# -------------------------------------------------
-# Cache
-# -------------------------------------------------
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
-    }
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # gzip/brotli copies are written at collectstatic time and served by WhiteNoise
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
 }
 
 # -------------------------------------------------
@@ -138,16 +163,16 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
-EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
-EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
-DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "Nearify <noreplynearify@gmail.com>")
+EMAIL_HOST_USER = _get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = _get("EMAIL_HOST_PASSWORD", "")
+DEFAULT_FROM_EMAIL = _get("DEFAULT_FROM_EMAIL", "Nearify <noreplynearify@gmail.com>")
 
 # -------------------------------------------------
 # Stripe
 # -------------------------------------------------
-STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
-STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
-STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+STRIPE_SECRET_KEY = _get("STRIPE_SECRET_KEY", "")
+STRIPE_PUBLISHABLE_KEY = _get("STRIPE_PUBLISHABLE_KEY", "")
+STRIPE_WEBHOOK_SECRET = _get("STRIPE_WEBHOOK_SECRET", "")
 
 # -------------------------------------------------
 # OpenStreetMap / Overpass (OSM)
@@ -155,7 +180,36 @@ STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 # Optional: you can set this in .env to switch Overpass servers if one is down
 # Example:
 # OVERPASS_URL=https://overpass-api.de/api/interpreter
-OVERPASS_URL = os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+OVERPASS_URL = _get("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
 
 # Optional caching seconds for OSM calls (your views/services can use this)
-OSM_CACHE_SECONDS = int(os.getenv("OSM_CACHE_SECONDS", "600"))
+OSM_CACHE_SECONDS = int(_get("OSM_CACHE_SECONDS", "600"))
+# Overpass search results (POIs change slowly; the calls are the slowest part of a search)
+OVERPASS_CACHE_SECONDS = int(_get("OVERPASS_CACHE_SECONDS", "3600"))
+
+# -------------------------------------------------
+# Cache
+# -------------------------------------------------
+# Set REDIS_URL in production so all gunicorn workers share one cache
+# (OSM lookups are otherwise duplicated per worker). Without it each process
+# keeps its own bounded in-memory cache.
+REDIS_URL = _get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "TIMEOUT": OSM_CACHE_SECONDS,
+            "KEY_PREFIX": "nearify",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "unique-snowflake",
+            "TIMEOUT": OSM_CACHE_SECONDS,
+            "OPTIONS": {"MAX_ENTRIES": 5000, "CULL_FREQUENCY": 3},
+        }
+    }
@@ -1,5 +1,6 @@
 # finder/admin.py
 from django.contrib import admin
+from django.db.models import Prefetch
 from .models import FeaturedBusiness, BusinessClaim, Business
 
 
@@ -14,9 +15,27 @@ class FeaturedBusinessAdmin(admin.ModelAdmin):
         "owner", "featured_until", "created_at",
     )
     list_filter = ("is_manual", "is_active", "plan", "state")
-    search_fields = ("name", "category", "location", "address", "city", "state", "zip_code", "phone", "url")
+    list_select_related = ("owner",)
+    # kept small: every entry is one more icontains scan per search ("=" = exact match)
+    search_fields = ("name", "category", "city", "state", "=zip_code", "=phone")
+    raw_id_fields = ("owner",)
     ordering = ("-created_at",)
 
+    # columns the changelist actually renders (+ location, used by __str__)
+    changelist_only = (
+        "name", "category", "city", "state", "location",
+        "is_manual", "is_active", "plan",
+        "owner", "featured_until", "created_at",
+    )
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # the change form still needs full rows; only slim down the list page
+        match = getattr(request, "resolver_match", None)
+        if match and match.url_name == "finder_featuredbusiness_changelist":
+            qs = qs.only(*self.changelist_only)
+        return qs
+
     # ✅ THIS is what controls what you can edit on the admin form
     fieldsets = (
         ("Core", {
@@ -59,11 +78,29 @@ class FeaturedBusinessAdmin(admin.ModelAdmin):
 
 @admin.register(BusinessClaim)
 class BusinessClaimAdmin(admin.ModelAdmin):
-    list_display = ("business", "user", "email", "status", "attempts", "expires_at", "verified_at", "created_at")
+    list_display = (
+        "business", "user", "email", "status", "pending_for_business",
+        "attempts", "expires_at", "verified_at", "created_at",
+    )
     list_filter = ("status",)
+    list_select_related = ("business", "user")
     search_fields = ("email", "business__name", "user__username", "user__email")
     readonly_fields = ("code_hash", "created_at", "verified_at", "last_sent_at")
 
+    def get_queryset(self, request):
+        # one extra query for all rows' pending claims instead of one per row
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                "business__claim_requests",
+                queryset=BusinessClaim.objects.filter(status=BusinessClaim.STATUS_PENDING).only("id", "business_id"),
+                to_attr="pending_claims",
+            )
+        )
+
+    @admin.display(description="Pending for business")
+    def pending_for_business(self, obj):
+        return len(getattr(obj.business, "pending_claims", ()))
+
 @admin.register(Business)
 class BusinessAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "city", "state", "is_claimed", "plan", "is_active")
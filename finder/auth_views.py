@@ -5,6 +5,9 @@ from django.shortcuts import redirect, render
 
 from .forms import SignUpForm  # keep your existing import if different
 
+# Backend passed to login() right after signup (settings lists more than one)
+_FIRST_BACKEND = settings.AUTHENTICATION_BACKENDS[0]
+
 
 def signup(request):
     if request.method == "POST":
@@ -13,8 +16,7 @@ def signup(request):
             user = form.save()
 
             # ✅ FIX: tell Django which backend to use (because you have multiple)
-            backend = settings.AUTHENTICATION_BACKENDS[0]
-            login(request, user, backend=backend)
+            login(request, user, backend=_FIRST_BACKEND)
 
             return redirect("login")  # or redirect("finder_home") / whatever you use
     else:
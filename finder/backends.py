@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 
 UserModel = get_user_model()
+_USERNAME_FIELD = UserModel.USERNAME_FIELD
 
 class EmailOrUsernameBackend(ModelBackend):
     """
@@ -12,24 +13,21 @@ class EmailOrUsernameBackend(ModelBackend):
 
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None:
-            username = kwargs.get(UserModel.USERNAME_FIELD)
+            username = kwargs.get(_USERNAME_FIELD)
 
         if not username or not password:
             return None
 
-        # Try to find user by username OR email (case-insensitive)
-        try:
-            user = UserModel.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-        except UserModel.DoesNotExist:
+        # Find user by username OR email (case-insensitive); if emails are
+        # not unique, the oldest account wins
+        user = (
+            UserModel.objects.filter(Q(username__iexact=username) | Q(email__iexact=username))
+            .order_by("pk")
+            .first()
+        )
+        if user is None:
             return None
-        except UserModel.MultipleObjectsReturned:
-            # If emails are not unique, pick the first match (better: enforce unique email)
-            user = UserModel.objects.filter(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            ).first()
 
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
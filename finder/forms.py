@@ -5,6 +5,34 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
 
+def _ph(text):
+    return forms.TextInput(attrs={"placeholder": text})
+
+def _url_ph(text):
+    return forms.URLInput(attrs={"placeholder": text})
+
+
+# Shared by ManualBusinessForm + EditBusinessForm
+_COMMON_WIDGETS = {
+    "name": _ph("Business name"),
+    "category": _ph("Category (e.g. Fitness, Salon)"),
+
+    # ✅ Better location inputs
+    "address": _ph("Street address (e.g. 123 Main St)"),
+    "city": _ph("City (e.g. Brownsburg)"),
+    "state": _ph("State (e.g. IN)"),
+    "zip_code": _ph("Zip code (optional)"),
+
+    "phone": _ph("Phone (optional)"),
+    "url": _url_ph("Website link (optional)"),
+
+    "image_url": _url_ph("Image URL (optional)"),
+
+    "open_time": forms.TimeInput(attrs={"type": "time"}),
+    "close_time": forms.TimeInput(attrs={"type": "time"}),
+}
+
+
 class ManualBusinessForm(forms.ModelForm):
     class Meta:
         model = FeaturedBusiness
@@ -29,24 +57,7 @@ class ManualBusinessForm(forms.ModelForm):
             "close_time",
         ]
 
-        widgets = {
-            "name": forms.TextInput(attrs={"placeholder": "Business name"}),
-            "category": forms.TextInput(attrs={"placeholder": "Category (e.g. Fitness, Salon)"}),
-
-            # ✅ Better location inputs
-            "address": forms.TextInput(attrs={"placeholder": "Street address (e.g. 123 Main St)"}),
-            "city": forms.TextInput(attrs={"placeholder": "City (e.g. Brownsburg)"}),
-            "state": forms.TextInput(attrs={"placeholder": "State (e.g. IN)"}),
-            "zip_code": forms.TextInput(attrs={"placeholder": "Zip code (optional)"}),
-
-            "phone": forms.TextInput(attrs={"placeholder": "Phone (optional)"}),
-            "url": forms.URLInput(attrs={"placeholder": "Website link (optional)"}),
-
-            "image_url": forms.URLInput(attrs={"placeholder": "Image URL (optional)"}),
-
-            "open_time": forms.TimeInput(attrs={"type": "time"}),
-            "close_time": forms.TimeInput(attrs={"type": "time"}),
-        }
+        widgets = _COMMON_WIDGETS
 
 
 class EditBusinessForm(forms.ModelForm):
@@ -86,23 +97,8 @@ class EditBusinessForm(forms.ModelForm):
         ]
 
         widgets = {
-            "name": forms.TextInput(attrs={"placeholder": "Business name"}),
-            "category": forms.TextInput(attrs={"placeholder": "Category (e.g. Fitness, Salon)"}),
-
-            "address": forms.TextInput(attrs={"placeholder": "Street address (e.g. 123 Main St)"}),
-            "city": forms.TextInput(attrs={"placeholder": "City (e.g. Brownsburg)"}),
-            "state": forms.TextInput(attrs={"placeholder": "State (e.g. IN)"}),
-            "zip_code": forms.TextInput(attrs={"placeholder": "Zip code (optional)"}),
-
-            "phone": forms.TextInput(attrs={"placeholder": "Phone (optional)"}),
-            "url": forms.URLInput(attrs={"placeholder": "Website link (optional)"}),
-
-            "image_url": forms.URLInput(attrs={"placeholder": "Image URL (optional)"}),
-
-            "open_time": forms.TimeInput(attrs={"type": "time"}),
-            "close_time": forms.TimeInput(attrs={"type": "time"}),
-
-            "holiday_note": forms.TextInput(attrs={"placeholder": "Holiday note (optional)"}),
+            **_COMMON_WIDGETS,
+            "holiday_note": _ph("Holiday note (optional)"),
         }
 
 
@@ -117,4 +113,11 @@ class SignUpForm(UserCreationForm):
 
     class Meta:
         model = User
-        fields = ("username", "email", "password1", "password2")
\ No newline at end of file
+        fields = ("username", "email", "password1", "password2")
+
+    def clean_email(self):
+        email = self.cleaned_data["email"]
+        # single EXISTS probe on the UPPER(email) index (migration 0020)
+        if User.objects.filter(email__iexact=email).only("pk").exists():
+            raise forms.ValidationError("An account with this email already exists.")
+        return email
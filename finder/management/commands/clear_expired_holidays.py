@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from finder.models import FeaturedBusiness
+
+
+class Command(BaseCommand):
+    help = "Clear holiday flags whose holiday_until has passed. Run from cron every few minutes."
+
+    def handle(self, *args, **options):
+        cleared = FeaturedBusiness.clear_expired_holidays()
+        self.stdout.write(f"Cleared {cleared} expired holiday(s).")
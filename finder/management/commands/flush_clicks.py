@@ -0,0 +1,41 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from finder.services import click_counter
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Write buffered analytics clicks from Redis to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and flush every N seconds (used by the procfile `clicks` process).",
+        )
+
+    def handle(self, *args, **options):
+        every = options["every"]
+        if every <= 0:
+            flushed = click_counter.flush()
+            self.stdout.write(f"Flushed {flushed} click(s).")
+            return
+
+        while True:
+            # CONN_MAX_AGE / CONN_HEALTH_CHECKS are only applied around
+            # requests; do it here so a dropped connection is replaced
+            close_old_connections()
+            try:
+                flushed = click_counter.flush()
+            except Exception:
+                # the batch stays in Redis for the next round
+                logger.exception("Click flush failed")
+            else:
+                self.stdout.write(f"Flushed {flushed} click(s).")
+            time.sleep(every)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def _table_and_column(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    qn = schema_editor.quote_name
+    return qn(User._meta.db_table), qn(User._meta.get_field("email").column)
+
+
+def add_email_upper_idx(apps, schema_editor):
+    table, column = _table_and_column(apps, schema_editor)
+    schema_editor.execute(f"CREATE INDEX IF NOT EXISTS auth_user_email_upper_idx ON {table} (UPPER({column}));")
+
+
+def drop_email_upper_idx(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS auth_user_email_upper_idx;")
+
+
+class Migration(migrations.Migration):
+    """
+    Index the user model's email for the case-insensitive duplicate check on
+    signup. On PostgreSQL `email__iexact` compiles to UPPER(email) = UPPER(%s),
+    so the index is on that expression. SQLite accepts the same DDL.
+    The table comes from AUTH_USER_MODEL rather than a hard-coded auth_user.
+    """
+
+    dependencies = [
+        ('finder', '0019_alter_featuredbusiness_owner_business'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_upper_idx, drop_email_upper_idx),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def add_username_upper_idx(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    qn = schema_editor.quote_name
+    table = qn(User._meta.db_table)
+    column = qn(User._meta.get_field("username").column)
+    schema_editor.execute(f"CREATE INDEX IF NOT EXISTS auth_user_username_upper_idx ON {table} (UPPER({column}));")
+
+
+def drop_username_upper_idx(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS auth_user_username_upper_idx;")
+
+
+class Migration(migrations.Migration):
+    """
+    Expression index for the `username__iexact` half of the login lookup in
+    EmailOrUsernameBackend (the email half is covered by 0020). Table and
+    column come from AUTH_USER_MODEL, as in 0020.
+    """
+
+    dependencies = [
+        ('finder', '0020_auth_user_email_upper_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(add_username_upper_idx, drop_username_upper_idx),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-15 21:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finder', '0021_auth_user_username_upper_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='featuredbusiness',
+            name='finder_feat_is_acti_e842ab_idx',
+        ),
+        migrations.AddIndex(
+            model_name='featuredbusiness',
+            index=models.Index(fields=['is_active', '-priority', 'featured_until'], name='fb_active_prio_until_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='featuredbusiness',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['featured_from', 'featured_until'], name='fb_live_partial_idx'),
+        ),
+    ]
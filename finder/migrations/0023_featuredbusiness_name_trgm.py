@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# icontains compiles to UPPER("col"::text) LIKE UPPER('%term%') on PostgreSQL,
+# so the trigram index has to be on the same expression to be picked up.
+def add_name_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS fb_name_trgm "
+        "ON finder_featuredbusiness USING gin ((UPPER(name::text)) gin_trgm_ops);"
+    )
+
+
+def drop_name_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS fb_name_trgm;")
+
+
+class Migration(migrations.Migration):
+    """
+    PostgreSQL-only GIN trigram index for `name__icontains` (admin search and
+    the search page). No-op on SQLite.
+    """
+
+    dependencies = [
+        ('finder', '0022_featuredbusiness_fb_active_prio_until_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_name_trgm, drop_name_trgm),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-15 21:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_location(apps, schema_editor):
+    # keep the display/search `location` string filled for rows that only have city/state
+    FeaturedBusiness = apps.get_model('finder', 'FeaturedBusiness')
+    rows = FeaturedBusiness.objects.filter(location='').exclude(city='', state='').only('id', 'city', 'state')
+    for biz in rows.iterator():
+        biz.location = ', '.join(p.strip() for p in (biz.city, biz.state) if p and p.strip())
+        biz.save(update_fields=['location'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finder', '0023_featuredbusiness_name_trgm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='featuredbusiness',
+            name='finder_feat_locatio_e5905f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='featuredbusiness',
+            index=models.Index(django.db.models.functions.text.Upper('city'), django.db.models.functions.text.Upper('state'), name='fb_city_state_idx'),
+        ),
+        migrations.RunPython(backfill_location, migrations.RunPython.noop),
+    ]
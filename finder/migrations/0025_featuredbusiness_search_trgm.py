@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# Same expression as fb_name_trgm (0023): icontains compiles to
+# UPPER("col"::text) LIKE UPPER('%term%') on PostgreSQL.
+TRGM_COLUMNS = ("category", "location", "address", "city", "state")
+
+
+def add_search_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    for col in TRGM_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS fb_{col}_trgm "
+            f"ON finder_featuredbusiness USING gin ((UPPER({col}::text)) gin_trgm_ops);"
+        )
+
+
+def drop_search_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for col in TRGM_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS fb_{col}_trgm;")
+
+
+class Migration(migrations.Migration):
+    """
+    PostgreSQL-only GIN trigram indexes for the other icontains columns the
+    search page filters on (term -> category, free-text location -> location/
+    address/city/state). No-op on SQLite.
+    """
+
+    dependencies = [
+        ('finder', '0024_featuredbusiness_city_state_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_trgm, drop_search_trgm),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-15 21:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finder', '0025_featuredbusiness_search_trgm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='featuredbusiness',
+            name='yelp_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='featuredbusiness',
+            constraint=models.UniqueConstraint(condition=models.Q(('yelp_id__isnull', False)), fields=('yelp_id',), name='fb_yelp_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-15 22:15
+
+from django.db import migrations, models
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finder', '0026_featuredbusiness_yelp_id_partial_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppliedClickBatch',
+            fields=[
+                ('batch_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('applied_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,13 +1,52 @@
 # finder/models.py
 import uuid
-import hashlib
-import random
+import hmac
 from datetime import timedelta, time
-from urllib.parse import urlparse
+from secrets import randbelow
 
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.functional import cached_property
+
+
+def domain_from_url(url: str) -> str:
+    """Lowercased host of `url` without a leading "www." (plain str scans, no urlparse)."""
+    if not url:
+        return ""
+    i = url.find("://")
+    host = url[i + 3:] if i >= 0 else url
+    for sep in "/?#":
+        j = host.find(sep)
+        if j >= 0:
+            host = host[:j]
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def address_parts(address, city, state, zip_code, location):
+    """
+    Returns: (address, city, state, zip_code), blanks as "".
+    City/state fall back to the legacy `location` string ("City, ST").
+    """
+    address = address or ""
+    city = city or ""
+    state = state or ""
+    zip_code = zip_code or ""
+
+    # fallback if only `location` is populated
+    if (not city and not state) and location:
+        if "," in location:
+            a, b = location.split(",", 1)
+            city = a.strip()
+            state = b.strip()
+        else:
+            city = location.strip()
+
+    return address, city, state, zip_code
 
 
 class FeaturedBusiness(models.Model):
@@ -54,7 +93,8 @@ class FeaturedBusiness(models.Model):
     is_manual = models.BooleanField(default=False)
 
     # Yelp / external fields
-    yelp_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    # unique via fb_yelp_id_uniq below (partial: most rows are manual and have none)
+    yelp_id = models.CharField(max_length=255, blank=True, null=True)
     url = models.URLField(blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
 
@@ -106,8 +146,25 @@ class FeaturedBusiness(models.Model):
         indexes = [
             models.Index(fields=["name"]),
             models.Index(fields=["category"]),
-            models.Index(fields=["location"]),
-            models.Index(fields=["is_active", "priority"]),
+            # "City, ST" searches: matches UPPER(col) = UPPER(%s) from iexact
+            models.Index(Upper("city"), Upper("state"), name="fb_city_state_idx"),
+            # featured list: active promos ordered by priority, then end date
+            # (its (is_active, priority) prefix also covers the old 2-column index)
+            models.Index(fields=["is_active", "-priority", "featured_until"], name="fb_active_prio_until_idx"),
+            # promo window checks only ever look at active rows
+            models.Index(
+                fields=["featured_from", "featured_until"],
+                condition=models.Q(is_active=True),
+                name="fb_live_partial_idx",
+            ),
+        ]
+        constraints = [
+            # external ids ("osm:node_123"); the index only covers rows that have one
+            models.UniqueConstraint(
+                fields=["yelp_id"],
+                condition=models.Q(yelp_id__isnull=False),
+                name="fb_yelp_id_uniq",
+            ),
         ]
         ordering = ["-created_at"]
 
@@ -144,6 +201,24 @@ class FeaturedBusiness(models.Model):
             self.priority = 0
             self.save(update_fields=["is_active", "priority"])
 
+    @classmethod
+    def expire_promotions(cls) -> int:
+        """deactivate_if_expired() for every active row at once (one UPDATE). Returns rows changed."""
+        return cls.objects.filter(
+            is_active=True, featured_until__isnull=False, featured_until__lt=timezone.now()
+        ).update(is_active=False, priority=0)
+
+
+    # -------------------------
+    # Analytics helpers
+    # -------------------------
+    @classmethod
+    def bump(cls, pk, field: str, by: int = 1) -> int:
+        """
+        Atomically add `by` to one counter column (e.g. "call_clicks").
+        Single-column UPDATE — no model load, no full-row save.
+        """
+        return cls.objects.filter(pk=pk).update(**{field: F(field) + by})
 
     # -------------------------
     # Availability helpers
@@ -152,14 +227,9 @@ class FeaturedBusiness(models.Model):
         now_dt = now_dt or timezone.localtime()
         now_time = now_dt.time()
 
-        # auto-clear holiday if expired
-        if self.is_on_holiday and self.holiday_until and self.holiday_until <= timezone.now():
-            self.is_on_holiday = False
-            self.holiday_until = None
-            self.holiday_note = None
-            self.save(update_fields=["is_on_holiday", "holiday_until", "holiday_note"])
-
-        if self.is_on_holiday:
+        # read-only: an expired holiday just counts as over here; the row itself
+        # is cleaned up in bulk by clear_expired_holidays()
+        if self.is_on_holiday and not (self.holiday_until and self.holiday_until <= timezone.now()):
             return False
 
         ot, ct = self.open_time, self.close_time
@@ -173,22 +243,28 @@ class FeaturedBusiness(models.Model):
         # Overnight (e.g. 8pm - 2am)
         return now_time >= ot or now_time <= ct
 
+    @classmethod
+    def clear_expired_holidays(cls) -> int:
+        """Turn off every holiday whose end date has passed (one UPDATE). Returns rows changed."""
+        return cls.objects.filter(is_on_holiday=True, holiday_until__lte=timezone.now()).update(
+            is_on_holiday=False, holiday_until=None, holiday_note=None
+        )
+
     # -------------------------
     # Map helpers
     # -------------------------
+    @cached_property
+    def resolved_address(self):
+        """(address, city, state, zip_code) — see address_parts(); computed once per instance."""
+        return address_parts(self.address, self.city, self.state, self.zip_code, self.location)
+
     def full_address(self) -> str:
         parts = [self.address, self.city, self.state, self.zip_code]
         return ", ".join([p.strip() for p in parts if p and p.strip()])
 
     def website_domain(self) -> str:
         """Return domain without www."""
-        if not self.url:
-            return ""
-        try:
-            host = urlparse(self.url).netloc.lower()
-            return host.replace("www.", "")
-        except Exception:
-            return ""
+        return domain_from_url(self.url)
 
     def __str__(self):
         return f"{self.name} ({self.location})"
@@ -259,11 +335,12 @@ class BusinessClaim(models.Model):
     # -------------------------
     @staticmethod
     def generate_code() -> str:
-        return f"{random.randint(100000, 999999)}"
+        return f"{100000 + randbelow(900000):06d}"
 
     @staticmethod
     def hash_code(code: str) -> str:
-        return hashlib.sha256(code.encode()).hexdigest()
+        # keyed: a plain hash of a 6-digit code is reversible by trying all 10^6
+        return salted_hmac("finder.claim.code", code, algorithm="sha256").digest()[:16].hex()
 
     def can_send_again(self, cooldown_seconds=60) -> bool:
         if not self.last_sent_at:
@@ -308,7 +385,7 @@ class BusinessClaim(models.Model):
 
         self.attempts += 1
 
-        if self.hash_code(code) == self.code_hash:
+        if hmac.compare_digest(self.hash_code(code), self.code_hash):
             self.status = self.STATUS_VERIFIED
             self.verified_at = timezone.now()
             self.save(update_fields=["attempts", "status", "verified_at"])
@@ -321,6 +398,21 @@ class BusinessClaim(models.Model):
 
 
 
+class AppliedClickBatch(models.Model):
+    """
+    Redis click batches already written to FeaturedBusiness counters.
+    Recorded in the same transaction as the UPDATEs so a batch that is
+    retried after a crash is skipped, not counted twice (see
+    finder.services.click_counter.flush). Rows are pruned after a day.
+    """
+
+    batch_id = models.CharField(max_length=32, primary_key=True)
+    applied_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.batch_id
+
+
 class Business(models.Model):
     PLAN_CHOICES = [
         ("free", "Free"),
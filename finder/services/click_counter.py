@@ -0,0 +1,99 @@
+# finder/services/click_counter.py
+"""
+Buffered analytics counters for the track_* endpoints.
+
+With REDIS_URL set, each click is a HINCRBY on one Redis hash per counter
+column, and `manage.py flush_clicks --every 60` (the `clicks` process in the
+procfile) writes the totals to the DB in a few bulk UPDATEs. Without Redis there is nowhere shared to buffer
+them, so clicks go straight to the DB via FeaturedBusiness.bump().
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from finder.models import AppliedClickBatch, FeaturedBusiness
+
+FIELDS = ("views_count", "call_clicks", "website_clicks", "directions_clicks")
+
+_KEY = "nearify:clicks:{}"
+_FLUSHING = _KEY + ":flushing"
+_BATCH_FIELD = "batch"  # batch id, stored in the :flushing hash next to the business ids
+_LOCK = "nearify:clicks:flush-lock"
+_client = None
+
+
+def _redis():
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def bump(field: str, biz_id) -> None:
+    client = _redis()
+    if client is not None:
+        try:
+            client.hincrby(_KEY.format(field), biz_id, 1)
+            return
+        except redis.RedisError:
+            pass  # Redis down: don't lose the click, write it through
+    FeaturedBusiness.bump(biz_id, field)
+
+
+def flush() -> int:
+    """
+    Move buffered clicks into the DB. Returns the number of clicks written.
+
+    Each hash is RENAMEd to a ":flushing" key (new clicks start a fresh hash)
+    and tagged with a batch id. The UPDATEs and an AppliedClickBatch row for
+    that id commit together, and the key is only deleted afterwards: a failed
+    run leaves the batch for the next one, and a batch whose DB write already
+    committed (crash or Redis error before the DELETE) is dropped, not applied
+    twice.
+    """
+    client = _redis()
+    if client is None:
+        return 0
+
+    lock = client.lock(_LOCK, timeout=300)
+    if not lock.acquire(blocking=False):
+        return 0  # another flush is running
+
+    total = 0
+    try:
+        for field in FIELDS:
+            pending = _FLUSHING.format(field)
+            # a leftover batch from a failed run goes first, as-is
+            if not client.exists(pending):
+                try:
+                    client.rename(_KEY.format(field), pending)
+                except redis.ResponseError:
+                    continue  # no clicks buffered for this field
+            client.hsetnx(pending, _BATCH_FIELD, uuid.uuid4().hex)
+
+            counts = client.hgetall(pending)
+            batch_id = counts.pop(_BATCH_FIELD.encode()).decode()
+
+            # one UPDATE per distinct delta, not per business
+            by_delta = defaultdict(list)
+            for biz_id, n in counts.items():
+                by_delta[int(n)].append(int(biz_id))
+            with transaction.atomic():
+                _, fresh = AppliedClickBatch.objects.get_or_create(batch_id=batch_id)
+                if fresh:
+                    for n, ids in by_delta.items():
+                        FeaturedBusiness.objects.filter(pk__in=ids).update(**{field: F(field) + n})
+            client.delete(pending)
+            if fresh:
+                total += sum(n * len(ids) for n, ids in by_delta.items())
+
+        AppliedClickBatch.objects.filter(applied_at__lt=timezone.now() - timedelta(days=1)).delete()
+    finally:
+        lock.release()
+    return total
@@ -1,8 +1,23 @@
 # finder/services/osm.py
 import os
+import re
+import sys
 import time
 import random
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from types import MappingProxyType
+
+import orjson
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
 NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
@@ -18,23 +33,186 @@ DEFAULT_UA = "Nearify/1.0 (contact: noreplynearify@gmail.com)"
 USER_AGENT = os.getenv("OSM_USER_AGENT", DEFAULT_UA)
 CONTACT_EMAIL = os.getenv("OSM_CONTACT_EMAIL", "").strip()
 
-_session = requests.Session()
-_session.headers.update(
-    {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/json",
-        "Accept-Language": "en",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-    }
+# Pool sized for the Overpass race + reverse-geocode threads running alongside
+# request threads (the default of 10 drops connections under load), with a
+# quick retry on transient gateway errors / connection resets (Nominatim GETs).
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET"],
+    ),
 )
 
-_geo_cache = {}
-_rev_cache = {}
-
-
-def _sleep():
-    # Nominatim rate limits. Keep it gentle.
-    time.sleep(1.05)
+# Overpass POSTs never retry at the HTTP layer: a retried query re-runs on the
+# mirror and holds a pool worker for another `timeout`. Failover is the hedge's
+# job (_race_overpass).
+_overpass_adapter = HTTPAdapter(pool_connections=len(OVERPASS_URLS), pool_maxsize=32, max_retries=0)
+
+_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "application/json",
+    "Accept-Language": "en",
+    "Accept-Encoding": "gzip, deflate",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Connection": "keep-alive",
+}
+
+# requests.Session isn't guaranteed thread-safe, and this module is called from
+# request threads plus the pools below. One Session per thread; they all mount
+# the same adapter, so the connection pool is still shared.
+_tls = threading.local()
+
+
+def _sess():
+    s = getattr(_tls, "session", None)
+    if s is None:
+        s = requests.Session()
+        s.mount("https://", _adapter)
+        s.mount("http://", _adapter)
+        for url in OVERPASS_URLS:
+            s.mount(url, _overpass_adapter)
+        s.headers.update(_HEADERS)
+        _tls.session = s
+    return s
+
+
+# Shared through Django's cache (Redis in production) so every worker benefits
+GEO_CACHE_SECONDS = 60 * 60 * 24 * 30
+REV_CACHE_SECONDS = 60 * 60 * 24 * 7
+NEGATIVE_CACHE_SECONDS = 60 * 5  # 403s / no results / network errors
+OVERPASS_EMPTY_CACHE_SECONDS = 60  # empty/failed searches: retry soon, but not on every hit
+# ETag/Last-Modified outlive the entries they came with, so an expired entry
+# can be revalidated with a conditional GET (a 304 has no body to send or parse)
+VALIDATOR_CACHE_SECONDS = 60 * 60 * 24 * 60
+
+
+def _json(r):
+    # orjson decodes the raw bytes 2-5x faster than r.json(); raises ValueError on bad JSON
+    return orjson.loads(r.content) if r.content else None
+
+
+def _validators(key):
+    """Returns: (previous_result or None, conditional request headers)"""
+    v = cache.get(key + ":v")
+    if v is None:
+        return None, {}
+    etag, last_modified, result = v
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return result, headers
+
+
+def _remember_validators(key, r, result):
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if etag or last_modified:
+        cache.set(key + ":v", (etag, last_modified, result), VALIDATOR_CACHE_SECONDS)
+
+
+def _cache_key(kind: str, raw: str) -> str:
+    # hashed so free-text queries are always valid cache keys
+    return f"osm:{kind}:" + hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _norm_query(q: str) -> str:
+    # "New York", "new  york" and "new-york" share one cache slot.
+    # Only used for keys; Nominatim still gets what the user typed.
+    q = unicodedata.normalize("NFKD", q).casefold()
+    q = "".join(c for c in q if not unicodedata.combining(c))
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", q)).strip()
+
+
+# Nominatim allows ~1 request/second in total — for the whole site, not per worker
+NOMINATIM_INTERVAL = 1.05
+# Longest a request thread will wait for a slot (two slots ahead at most)
+NOMINATIM_MAX_WAIT = 2.2
+# Background lookups only claim a slot this close to its start, so anything a
+# user request could still have booked is left for it
+NOMINATIM_IDLE_MARGIN = 0.1
+_NOMINATIM_SLOT_TTL = 60
+NOMINATIM_BUSY = "Location lookup is busy right now. Please try again in a minute."
+
+
+def _nominatim_gate(max_wait=None):
+    """
+    Pacing via the Django cache: each caller atomically claims the next free
+    1.05s slot (cache.add) and sleeps until it starts, so concurrent callers
+    queue up instead of each sleeping a fixed 1.05s.
+
+    The slots are only site-wide when the cache is shared (Redis, REDIS_URL
+    set). With the LocMem fallback each process paces itself, so N workers
+    can send up to N requests per interval.
+
+    Only slots starting within `max_wait` seconds (default NOMINATIM_MAX_WAIT)
+    are considered. Returns False, without sleeping, if they're all taken;
+    the caller must then skip the request rather than send it unpaced.
+    Background work uses _nominatim_idle_slot() instead.
+    """
+    if max_wait is None:
+        max_wait = NOMINATIM_MAX_WAIT
+    slot = int(time.time() / NOMINATIM_INTERVAL) + 1
+    while True:
+        delay = slot * NOMINATIM_INTERVAL - time.time()
+        if delay > max_wait:
+            return False
+        if cache.add(f"osm:nominatim:slot:{slot}", 1, timeout=_NOMINATIM_SLOT_TTL):
+            if delay > 0:
+                time.sleep(delay)
+            return True
+        slot += 1
+
+
+def _nominatim_idle_slot(give_up_after=10):
+    """
+    _nominatim_gate() for background work: waits for a slot that is still
+    free NOMINATIM_IDLE_MARGIN before it starts, so it never books ahead of a
+    user request. Returns False after `give_up_after` slots all went to others.
+    """
+    for _ in range(give_up_after):
+        slot = int(time.time() / NOMINATIM_INTERVAL) + 1
+        delay = slot * NOMINATIM_INTERVAL - time.time()
+        if delay > NOMINATIM_IDLE_MARGIN:
+            time.sleep(delay - NOMINATIM_IDLE_MARGIN)
+        if cache.add(f"osm:nominatim:slot:{slot}", 1, timeout=_NOMINATIM_SLOT_TTL):
+            time.sleep(max(0.0, slot * NOMINATIM_INTERVAL - time.time()))
+            return True
+        time.sleep(max(0.0, slot * NOMINATIM_INTERVAL - time.time()))
+    return False
+
+
+# Per-process LRU in front of the shared cache for the handful of locations
+# everyone searches ("NYC, NY"...): saves the Redis round-trip. Successful
+# lookups only, so errors still expire from the shared cache on schedule.
+GEO_LOCAL_MAX = 2048
+_geo_local = OrderedDict()
+_geo_local_lock = threading.Lock()
+
+
+def _geo_local_get(key):
+    with _geo_local_lock:
+        hit = _geo_local.get(key)
+        if hit is not None:
+            _geo_local.move_to_end(key)
+        return hit
+
+
+def _geo_local_put(key, result):
+    with _geo_local_lock:
+        _geo_local[key] = result
+        _geo_local.move_to_end(key)
+        if len(_geo_local) > GEO_LOCAL_MAX:
+            _geo_local.popitem(last=False)
 
 
 def geocode_location(query: str, *, timeout=15):
@@ -45,11 +223,18 @@ def geocode_location(query: str, *, timeout=15):
     if not q:
         return None, None, "", "Empty location."
 
-    key = q.lower()
-    if key in _geo_cache:
-        return _geo_cache[key]
+    key = _cache_key("geo", _norm_query(q))
+    local = _geo_local_get(key)
+    if local is not None:
+        return local
+    cached = cache.get(key)
+    if cached is not None:
+        if cached[3] is None:
+            _geo_local_put(key, cached)
+        return cached
 
-    _sleep()
+    if not _nominatim_gate():
+        return None, None, "", NOMINATIM_BUSY  # not cached: it's the queue, not the query
 
     params = {
         "q": q,
@@ -60,8 +245,15 @@ def geocode_location(query: str, *, timeout=15):
     if CONTACT_EMAIL:
         params["email"] = CONTACT_EMAIL
 
+    previous, conditional = _validators(key)
+
     try:
-        r = _session.get(NOMINATIM_SEARCH_URL, params=params, timeout=timeout)
+        r = _sess().get(NOMINATIM_SEARCH_URL, params=params, headers=conditional, timeout=timeout)
+
+        if r.status_code == 304 and previous is not None:
+            cache.set(key, previous, GEO_CACHE_SECONDS)
+            _geo_local_put(key, previous)
+            return previous
 
         if r.status_code == 403:
             err = (
@@ -72,14 +264,14 @@ def geocode_location(query: str, *, timeout=15):
                 "Then restart the server."
             )
             result = (None, None, "", err)
-            _geo_cache[key] = result
+            cache.set(key, result, NEGATIVE_CACHE_SECONDS)
             return result
 
         r.raise_for_status()
-        data = r.json() or []
+        data = _json(r) or []
         if not data:
             result = (None, None, "", "No geocoding results for that location.")
-            _geo_cache[key] = result
+            cache.set(key, result, NEGATIVE_CACHE_SECONDS)
             return result
 
         item = data[0]
@@ -88,24 +280,41 @@ def geocode_location(query: str, *, timeout=15):
         display = item.get("display_name", q)
 
         result = (lat, lon, display, None)
-        _geo_cache[key] = result
+        cache.set(key, result, GEO_CACHE_SECONDS)
+        _geo_local_put(key, result)
+        _remember_validators(key, r, result)
         return result
 
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         result = (None, None, "", f"Geocoding failed: {e}")
-        _geo_cache[key] = result
+        cache.set(key, result, NEGATIVE_CACHE_SECONDS)
         return result
 
 
-def reverse_geocode(lat: float, lon: float, *, timeout=15):
+def _rev_point(lat, lon):
+    """Returns: (lat, lon, cache_key) for the rounded point reverse_geocode() queries."""
+    # 4 decimals is ~10m: street-level, which is all enrichment needs, and
+    # neighbouring POIs share a slot. Query with the rounded point too so the
+    # cached answer is the same whichever POI filled it. (+ 0.0 folds -0.0.)
+    lat, lon = round(lat, 4) + 0.0, round(lon, 4) + 0.0
+    return lat, lon, f"osm:rev:{lat:.4f},{lon:.4f}"
+
+
+def reverse_geocode(lat: float, lon: float, *, timeout=15, cached_only=False, background=False):
     """
     Returns: (address, city, state, zip_code)
+    cached_only=True answers from the cache or returns blanks, never the network.
+    background=True waits for an idle Nominatim slot (cache warm-ups).
     """
-    key = f"{lat:.5f},{lon:.5f}"
-    if key in _rev_cache:
-        return _rev_cache[key]
+    lat, lon, key = _rev_point(lat, lon)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    if cached_only:
+        return ("", "", "", "")
 
-    _sleep()
+    if not (_nominatim_idle_slot() if background else _nominatim_gate()):
+        return ("", "", "", "")
 
     params = {
         "lat": lat,
@@ -117,12 +326,19 @@ def reverse_geocode(lat: float, lon: float, *, timeout=15):
     if CONTACT_EMAIL:
         params["email"] = CONTACT_EMAIL
 
+    previous, conditional = _validators(key)
+
     try:
-        r = _session.get(NOMINATIM_REVERSE_URL, params=params, timeout=timeout)
+        r = _sess().get(NOMINATIM_REVERSE_URL, params=params, headers=conditional, timeout=timeout)
+        if r.status_code == 304 and previous is not None:
+            cache.set(key, previous, REV_CACHE_SECONDS)
+            return previous
         if r.status_code == 403:
-            return ("", "", "", "")
+            out = ("", "", "", "")
+            cache.set(key, out, NEGATIVE_CACHE_SECONDS)
+            return out
         r.raise_for_status()
-        data = r.json() or {}
+        data = _json(r) or {}
         addr = data.get("address") or {}
 
         # Nominatim uses different keys depending on area
@@ -136,118 +352,203 @@ def reverse_geocode(lat: float, lon: float, *, timeout=15):
         address = (" ".join([housenumber, road])).strip()
 
         out = (address, city, state, zip_code)
-        _rev_cache[key] = out
+        cache.set(key, out, REV_CACHE_SECONDS)
+        _remember_validators(key, r, out)
         return out
-    except requests.RequestException:
+    except (requests.RequestException, ValueError):
         return ("", "", "", "")
 
 
-def _shuffled_overpass_urls():
-    urls = OVERPASS_URLS[:]
-    random.shuffle(urls)
-    return urls
+# Per-process mirror health: EWMA of response time (seconds) + consecutive
+# failures. Best-scoring mirrors are tried first; a small share of searches
+# shuffle the order so a recovered mirror gets noticed again.
+MIRROR_EXPLORE_RATE = 0.1
+MIRROR_FAIL_RESET_SECONDS = 300
 
+MIRROR_STATS = {url: {"ewma": 1.0, "fail_streak": 0, "failed_at": 0.0} for url in OVERPASS_URLS}
+_mirror_lock = threading.Lock()
 
-def overpass_search(term: str, lat: float, lon: float, radius_m=8000, limit=40, timeout=20):
-    """
-    Returns list of normalized dicts:
-      {name,address,city,state,zip_code,url,phone,lat,lon,osm_id}
-    """
-    term = (term or "").strip().lower()
-    if not term:
-        return []
 
-    TAG_MAP = {
-        "gas": [("amenity", "fuel")],
-        "gas station": [("amenity", "fuel")],
-        "fuel": [("amenity", "fuel")],
+def _mirror_score(url):
+    st = MIRROR_STATS[url]
+    if st["fail_streak"] and time.monotonic() - st["failed_at"] > MIRROR_FAIL_RESET_SECONDS:
+        st["fail_streak"] = 0
+    return st["ewma"] * (1 + st["fail_streak"])
 
-        "grocery": [("shop", "supermarket"), ("shop", "convenience"), ("shop", "grocery")],
-        "supermarket": [("shop", "supermarket")],
-        "convenience": [("shop", "convenience")],
 
-        "salon": [("shop", "hairdresser"), ("shop", "beauty")],
-        "barber": [("shop", "barber"), ("shop", "hairdresser")],
+def _ranked_mirrors():
+    urls = OVERPASS_URLS[:]
+    if random.random() < MIRROR_EXPLORE_RATE:
+        random.shuffle(urls)
+        return urls
+    with _mirror_lock:
+        return sorted(urls, key=_mirror_score)
+
+
+def _record_mirror(url, elapsed=None):
+    """elapsed=None records a failure."""
+    with _mirror_lock:
+        st = MIRROR_STATS[url]
+        if elapsed is None:
+            st["fail_streak"] += 1
+            st["failed_at"] = time.monotonic()
+        else:
+            st["ewma"] = 0.8 * st["ewma"] + 0.2 * elapsed
+            st["fail_streak"] = 0
 
-        "pizza": [("amenity", "restaurant"), ("amenity", "fast_food")],
-        "restaurant": [("amenity", "restaurant")],
-        "cafe": [("amenity", "cafe")],
-        "coffee": [("amenity", "cafe")],
 
-        "pharmacy": [("amenity", "pharmacy")],
-        "hospital": [("amenity", "hospital")],
-        "hotel": [("tourism", "hotel")],
+# Hedged requests: ask the best mirror first; if it hasn't answered after
+# OVERPASS_HEDGE_AFTER seconds, ask the next one too and take whichever
+# answers first. A failed mirror is replaced by the next one in line.
+OVERPASS_HEDGE_AFTER = 3.0
 
-        "gym": [("leisure", "fitness_centre"), ("amenity", "gym")],
-        "fitness": [("leisure", "fitness_centre"), ("amenity", "gym")],
-    }
+_overpass_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="overpass")
 
-    pairs = TAG_MAP.get(term)
 
-    if pairs:
-        parts = []
-        for k, v in pairs:
-            parts.append(f'node(around:{radius_m},{lat},{lon})["{k}"="{v}"];')
-            parts.append(f'way(around:{radius_m},{lat},{lon})["{k}"="{v}"];')
-            parts.append(f'relation(around:{radius_m},{lat},{lon})["{k}"="{v}"];')
-        selector = "\n".join(parts)
-    else:
-        safe = term.replace('"', "").replace("\\", "")
-        selector = f"""
-          node(around:{radius_m},{lat},{lon})["name"~"{safe}",i];
-          way(around:{radius_m},{lat},{lon})["name"~"{safe}",i];
-          relation(around:{radius_m},{lat},{lon})["name"~"{safe}",i];
-
-          node(around:{radius_m},{lat},{lon})["amenity"~"{safe}",i];
-          way(around:{radius_m},{lat},{lon})["amenity"~"{safe}",i];
-          relation(around:{radius_m},{lat},{lon})["amenity"~"{safe}",i];
-
-          node(around:{radius_m},{lat},{lon})["shop"~"{safe}",i];
-          way(around:{radius_m},{lat},{lon})["shop"~"{safe}",i];
-          relation(around:{radius_m},{lat},{lon})["shop"~"{safe}",i];
-
-          node(around:{radius_m},{lat},{lon})["tourism"~"{safe}",i];
-          way(around:{radius_m},{lat},{lon})["tourism"~"{safe}",i];
-          relation(around:{radius_m},{lat},{lon})["tourism"~"{safe}",i];
-        """
-
-    query = f"""
-    [out:json][timeout:60];
-    (
-      {selector}
-    );
-    out tags center;
-    """
+def _post_overpass(url: str, body: bytes, timeout):
+    # The query ends in `out ... {limit}`, so the body never holds more than
+    # `limit` elements; parsing it whole is cheaper than a streaming parser.
+    started = time.monotonic()
+    try:
+        r = _sess().post(url, data=body, timeout=timeout)
+        r.raise_for_status()
+        data = _json(r) or {}
+    except Exception:
+        _record_mirror(url)
+        raise
+    _record_mirror(url, time.monotonic() - started)
+    return data.get("elements", []) or []
+
 
-    elements = []
+def _race_overpass(body: bytes, timeout):
+    """
+    Returns: (elements, last_error)
+    Wall-clock time is capped at `timeout` overall. Losers can't be
+    interrupted mid-request; they finish (or time out) in the pool and their
+    result is ignored.
+    """
+    urls = iter(_ranked_mirrors())
+    pending = set()
     last_err = None
+    deadline = time.monotonic() + timeout
+    hedged = False
+
+    def submit_next():
+        url = next(urls, None)
+        if url:
+            pending.add(_overpass_pool.submit(_post_overpass, url, body, timeout))
 
-    for url in _shuffled_overpass_urls():
+    submit_next()
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(
+            pending,
+            timeout=remaining if hedged else min(remaining, OVERPASS_HEDGE_AFTER),
+            return_when=FIRST_COMPLETED,
+        )
+        if not done:
+            if not hedged:
+                hedged = True
+                submit_next()
+            continue
+
+        for fut in done:
+            pending.discard(fut)
             try:
-                r = _session.post(url, data=query.encode("utf-8"), timeout=timeout)
-                r.raise_for_status()
-                data = r.json() or {}
-                elements = data.get("elements", []) or []
-                last_err = None
-                break
+                return fut.result(), None
             except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
                 # DNS fail / no internet / server down
                 last_err = e
-                continue
-            except requests.RequestException as e:
+            except (requests.RequestException, ValueError) as e:
                 last_err = e
-                continue
+            submit_next()
 
-        # ✅ instead of raising, return [] so your app stays usable
-    if last_err and not elements:
-            return []
+    if pending and last_err is None:
+        last_err = requests.exceptions.Timeout(f"No Overpass mirror answered within {timeout}s")
+    return [], last_err
 
-    results = []
-    seen = set()
 
-    for el in elements:
-        tags = el.get("tags") or {}
+# search term -> OSM tags to match (read-only: _TERM_SELECTORS is built from it once)
+TAG_MAP = MappingProxyType({
+    "gas": [("amenity", "fuel")],
+    "gas station": [("amenity", "fuel")],
+    "fuel": [("amenity", "fuel")],
+
+    "grocery": [("shop", "supermarket"), ("shop", "convenience"), ("shop", "grocery")],
+    "supermarket": [("shop", "supermarket")],
+    "convenience": [("shop", "convenience")],
+
+    "salon": [("shop", "hairdresser"), ("shop", "beauty")],
+    "barber": [("shop", "barber"), ("shop", "hairdresser")],
+
+    "pizza": [("amenity", "restaurant"), ("amenity", "fast_food")],
+    "restaurant": [("amenity", "restaurant")],
+    "cafe": [("amenity", "cafe")],
+    "coffee": [("amenity", "cafe")],
+
+    "pharmacy": [("amenity", "pharmacy")],
+    "hospital": [("amenity", "hospital")],
+    "hotel": [("tourism", "hotel")],
+
+    "gym": [("leisure", "fitness_centre"), ("amenity", "gym")],
+    "fitness": [("leisure", "fitness_centre"), ("amenity", "gym")],
+})
+
+
+def _compile_selector(pairs) -> str:
+    # nwr = node + way + relation in one statement; QL needs no newlines between them
+    return "".join(f'nwr(around:{{r}},{{la}},{{lo}})["{k}"="{v}"];' for k, v in pairs)
+
+
+# Built once at import; only {r},{la},{lo} are filled in per request
+_TERM_SELECTORS = MappingProxyType(
+    {sys.intern(term): _compile_selector(pairs) for term, pairs in TAG_MAP.items()}
+)
 
+# quotes/backslashes would break out of the QL string literal
+_SANITIZE = str.maketrans("", "", '"\\')
+
+# Unknown terms: one case-insensitive regex on name only (regex is the
+# expensive part on the Overpass side) ...
+_FALLBACK_SELECTOR = 'nwr(around:{r},{la},{lo})["name"~"{safe}",i];'
+
+# ... plus exact tag-value matches when the term could itself be a tag value
+# ("bakery" -> shop=bakery)
+_FALLBACK_TAG_KEYS = ("amenity", "shop", "tourism")
+_TAG_VALUE_RE = re.compile(r"^[a-z_]+$")
+
+
+def _fallback_selector(safe: str, radius_m, lat, lon) -> str:
+    selector = _FALLBACK_SELECTOR.format(r=radius_m, la=lat, lo=lon, safe=safe)
+    tag_value = safe.replace(" ", "_")
+    if _TAG_VALUE_RE.match(tag_value):
+        selector += _compile_selector((k, tag_value) for k in _FALLBACK_TAG_KEYS).format(
+            r=radius_m, la=lat, lo=lon
+        )
+    return selector
+
+
+# result field -> OSM tags to try, first non-empty wins
+_RESULT_TAGS = (
+    ("city", ("addr:city", "addr:suburb")),
+    ("state", ("addr:state",)),
+    ("zip_code", ("addr:postcode",)),
+    ("url", ("website", "contact:website", "url")),
+    ("phone", ("phone", "contact:phone")),
+)
+
+
+def _iter_normalized(elements, term):
+    """
+    Yields normalized result dicts for Overpass elements, skipping duplicates
+    and anything without coordinates. Lazy, so islice() stops the work at
+    `limit` results.
+    """
+    seen = set()
+    for el in elements:
         # center/latlon
         if "lat" in el and "lon" in el:
             rlat, rlon = el.get("lat"), el.get("lon")
@@ -258,52 +559,134 @@ def overpass_search(term: str, lat: float, lon: float, radius_m=8000, limit=40,
         if rlat is None or rlon is None:
             continue
 
-        name = (tags.get("name") or "").strip() or term.title()
+        # tuple key: no string built for duplicates
+        key = (el.get("type", ""), el.get("id", ""))
+        if key in seen:
+            continue
+        seen.add(key)
 
-        housenumber = tags.get("addr:housenumber", "") or ""
-        street = tags.get("addr:street", "") or ""
+        tags = el.get("tags") or {}
+        tags_get = tags.get
+        name = (tags_get("name") or "").strip() or term.title()
+        housenumber = tags_get("addr:housenumber") or ""
+        street = tags_get("addr:street") or ""
         address = (" ".join([housenumber, street])).strip()
 
-        city = tags.get("addr:city", "") or tags.get("addr:suburb", "") or ""
-        state = tags.get("addr:state", "") or ""
-        zip_code = tags.get("addr:postcode", "") or ""
+        item = {"osm_id": f"{key[0]}_{key[1]}", "name": name, "address": address}
+        for field, keys in _RESULT_TAGS:
+            item[field] = next((tags[k] for k in keys if tags_get(k)), "")
+        item["lat"] = rlat
+        item["lon"] = rlon
+        yield item
 
-        osm_id = f"{el.get('type','')}_{el.get('id','')}"
-        if osm_id in seen:
-            continue
-        seen.add(osm_id)
 
-        url = (
-            tags.get("website", "")
-            or tags.get("contact:website", "")
-            or tags.get("url", "")
-        )
-        phone = tags.get("phone", "") or tags.get("contact:phone", "")
-
-        # ✅ If missing address parts, try reverse geocode (best effort)
-        if (not address or not city or not state) and rlat and rlon:
-            r_address, r_city, r_state, r_zip = reverse_geocode(float(rlat), float(rlon))
-            address = address or r_address
-            city = city or r_city
-            state = state or r_state
-            zip_code = zip_code or r_zip
-
-        results.append(
-            {
-                "osm_id": osm_id,
-                "name": name,
-                "address": address,
-                "city": city,
-                "state": state,
-                "zip_code": zip_code,
-                "url": url,
-                "phone": phone,
-                "lat": rlat,
-                "lon": rlon,
-            }
-        )
+def overpass_search(term: str, lat: float, lon: float, radius_m=8000, limit=40, timeout=20, enrich=False):
+    """
+    Returns list of normalized dicts:
+      {name,address,city,state,zip_code,url,phone,lat,lon,osm_id}
+    Address fields are only what OSM tags provide unless enrich=True
+    (see enrich_addresses — up to ~1s per missing address).
+    """
+    term = (term or "").strip().lower()
+    if not term:
+        return []
 
-        if len(results) >= limit:
-            break
+    # same term within the same ~1km cell -> same answer. The search is centred
+    # on the cell too, so the cached answer doesn't depend on who asked first
+    # (a few hundred metres is noise against a multi-km radius).
+    lat, lon = round(lat, 2) + 0.0, round(lon, 2) + 0.0
+    ck = _cache_key("ov", f"{term}:{lat:.2f}:{lon:.2f}:{radius_m}:{limit}")
+    cached = cache.get(ck)
+    if cached is not None:
+        return enrich_addresses(cached) if enrich else cached
+
+    tmpl = _TERM_SELECTORS.get(term)
+    if tmpl is not None:
+        selector = tmpl.format(r=radius_m, la=lat, lo=lon)
+    else:
+        safe = term.translate(_SANITIZE)
+        selector = _fallback_selector(safe, radius_m, lat, lon)
+
+    # no layout whitespace: the body goes out as-is to every mirror we try
+    body = f"[out:json][timeout:60];({selector});out tags center {limit};".encode("utf-8")
+
+    elements, last_err = _race_overpass(body, timeout)
+
+    # ✅ instead of raising, return [] so your app stays usable
+    if last_err and not elements:
+        cache.set(ck, [], OVERPASS_EMPTY_CACHE_SECONDS)
+        return []
 
+    results = list(islice(_iter_normalized(elements, term), limit))
+
+    cache.set(ck, results, settings.OVERPASS_CACHE_SECONDS if results else OVERPASS_EMPTY_CACHE_SECONDS)
+
+    # ✅ If missing address parts, try reverse geocode (best effort)
+    if enrich:
+        enrich_addresses(results)
     return results
+
+
+_reverse_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nominatim")
+# one warm-up job at a time, lookups one by one; kept apart from _reverse_pool
+_background_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="osm-enrich")
+# running + queued warm-ups; past this, new ones are dropped (it's only a warm-up)
+_background_slots = threading.BoundedSemaphore(4)
+
+
+def _missing_addresses(results):
+    """{(lat, lon): [results at that point missing address parts]}"""
+    missing = {}
+    for r in results:
+        if (not r["address"] or not r["city"] or not r["state"]) and r["lat"] and r["lon"]:
+            missing.setdefault((float(r["lat"]), float(r["lon"])), []).append(r)
+    return missing
+
+
+def enrich_addresses(results, *, cached_only=False):
+    """
+    Fill missing address/city/state/zip on overpass_search() results (in place)
+    by reverse geocoding, in parallel. _nominatim_gate() still spaces the
+    actual requests 1.05s apart (site-wide with Redis); running them concurrently overlaps
+    the network round-trips with the wait.
+    cached_only=True uses only already-cached lookups, fetched in one
+    cache.get_many() (no network, no waiting).
+    """
+    missing = _missing_addresses(results)
+    if not missing:
+        return results
+
+    coords = list(missing)
+    if cached_only:
+        keys = [_rev_point(*c)[2] for c in coords]
+        hits = cache.get_many(keys)
+        lookups = [hits.get(k, ("", "", "", "")) for k in keys]
+    else:
+        lookups = _reverse_pool.map(lambda c: reverse_geocode(*c), coords)
+    for coord, (r_address, r_city, r_state, r_zip) in zip(coords, lookups):
+        for r in missing[coord]:
+            r["address"] = r["address"] or r_address
+            r["city"] = r["city"] or r_city
+            r["state"] = r["state"] or r_state
+            r["zip_code"] = r["zip_code"] or r_zip
+    return results
+
+
+def _warm_addresses(results):
+    # Sequential, on idle Nominatim slots only: a warm-up never queues ahead
+    # of a user's geocode. Points that don't get a slot are left for a later
+    # search to warm.
+    for lat, lon in _missing_addresses(results):
+        reverse_geocode(lat, lon, background=True)
+
+
+def enrich_addresses_in_background(results):
+    """
+    Warm the reverse-geocode cache for `results` without blocking the caller.
+    Returns False (and does nothing) if enough warm-ups are already pending.
+    """
+    if not _background_slots.acquire(blocking=False):
+        return False
+    future = _background_pool.submit(_warm_addresses, [dict(r) for r in results])
+    future.add_done_callback(lambda _f: _background_slots.release())
+    return True
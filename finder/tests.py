@@ -1,3 +1,329 @@
-from django.test import TestCase
+import re
+import threading
+import time as clock
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from finder.models import BusinessClaim, FeaturedBusiness
+from finder.services import click_counter, osm
+from finder.views import _featured_now_q
+
+
+class _FakeLock:
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+
+class _FakeRedis:
+    """Just the hash/key commands click_counter uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def hincrby(self, key, field, n):
+        h = self.data.setdefault(key, {})
+        h[str(field).encode()] = h.get(str(field).encode(), 0) + n
+
+    def hsetnx(self, key, field, value):
+        h = self.data.setdefault(key, {})
+        return int(h.setdefault(field.encode(), value) is value)
+
+    def hgetall(self, key):
+        return {f: str(n).encode() for f, n in self.data.get(key, {}).items()}
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def rename(self, src, dst):
+        if src not in self.data:
+            raise redis.ResponseError("no such key")
+        self.data[dst] = self.data.pop(src)
+
+    def delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+    def lock(self, name, timeout=None):
+        return _FakeLock()
+
+
+class ClickFlushTests(TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(click_counter, "_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.a = FeaturedBusiness.objects.create(name="A")
+        self.b = FeaturedBusiness.objects.create(name="B")
+
+    def test_clicks_are_buffered_then_flushed(self):
+        for _ in range(3):
+            self.client.post(reverse("track_call", args=[self.a.id]))
+        self.client.post(reverse("track_call", args=[self.b.id]))
+        self.client.post(reverse("track_web", args=[self.b.id]))
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.call_clicks, 0)
+
+        call_command("flush_clicks", stdout=mock.Mock())
+
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.call_clicks, self.b.call_clicks, self.b.website_clicks), (3, 1, 1))
+        self.assertEqual(self.redis.data, {})
+
+    def test_failed_update_keeps_the_batch_for_the_next_flush(self):
+        click_counter.bump("call_clicks", self.a.id)
+        with mock.patch("finder.services.click_counter.transaction.atomic", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                click_counter.flush()
+        self.assertIn("nearify:clicks:call_clicks:flushing", self.redis.data)
+
+        click_counter.bump("call_clicks", self.a.id)  # lands in a fresh hash
+        self.assertEqual(click_counter.flush(), 1)
+        self.assertEqual(click_counter.flush(), 1)
+
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.call_clicks, 2)
+        self.assertEqual(self.redis.data, {})
+
+    def test_every_loop_survives_a_failed_flush(self):
+        rounds = iter([RuntimeError("db down"), 5])
+
+        def flush():
+            result = next(rounds)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with mock.patch.object(click_counter, "flush", side_effect=flush), \
+                mock.patch("finder.management.commands.flush_clicks.close_old_connections") as close_old, \
+                mock.patch("finder.management.commands.flush_clicks.time.sleep", side_effect=[None, KeyboardInterrupt]), \
+                self.assertLogs("finder.management.commands.flush_clicks", "ERROR"):
+            out = mock.Mock()
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("flush_clicks", every=60, stdout=out)
+
+        self.assertEqual(close_old.call_count, 2)
+        out.write.assert_called_once_with("Flushed 5 click(s).\n")
+
+    def test_batch_already_written_is_not_applied_twice(self):
+        click_counter.bump("call_clicks", self.a.id)
+        with mock.patch.object(self.redis, "delete", side_effect=redis.RedisError):
+            with self.assertRaises(redis.RedisError):
+                click_counter.flush()  # UPDATE committed, DEL failed
+
+        self.assertEqual(click_counter.flush(), 0)
+
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.call_clicks, 1)
+        self.assertEqual(self.redis.data, {})
+
+
+class ClaimCodeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner", password="pw")
+        self.biz = FeaturedBusiness.objects.create(name="Cafe", url="https://www.cafe.example/menu")
+        self.client.force_login(self.user)
+
+    def _request_code(self):
+        self.client.post(reverse("claim_request", args=[self.biz.id]), {"email": "me@cafe.example"})
+        claim = BusinessClaim.objects.get(business=self.biz)
+        code = re.search(r"code is: (\d{6})", mail.outbox[-1].body).group(1)
+        return claim, code
+
+    def test_hash_is_keyed_and_stable(self):
+        self.assertEqual(BusinessClaim.hash_code("123456"), BusinessClaim.hash_code("123456"))
+        self.assertNotEqual(BusinessClaim.hash_code("123456"), BusinessClaim.hash_code("123457"))
+        self.assertEqual(len(BusinessClaim.hash_code("123456")), 32)
+
+    def test_emailed_code_verifies(self):
+        claim, code = self._request_code()
+        self.assertEqual(claim.code_hash, BusinessClaim.hash_code(code))
+
+        resp = self.client.post(reverse("claim_verify", args=[claim.id]), {"code": code})
+
+        self.assertRedirects(resp, reverse("dashboard"), fetch_redirect_response=False)
+        self.biz.refresh_from_db()
+        self.assertEqual(self.biz.owner_id, self.user.id)
+
+    def test_wrong_code_is_rejected(self):
+        claim, code = self._request_code()
+        wrong = f"{(int(code) + 1) % 1000000:06d}"
+
+        self.client.post(reverse("claim_verify", args=[claim.id]), {"code": wrong})
+
+        claim.refresh_from_db()
+        self.biz.refresh_from_db()
+        self.assertIsNone(claim.verified_at)
+        self.assertIsNone(self.biz.owner_id)
+
+    def test_model_round_trip(self):
+        claim, code = BusinessClaim.create_claim(self.biz, self.user, "me@cafe.example")
+        self.assertTrue(claim.verify(code))
+
+
+class FeaturedNowQueryTests(TestCase):
+    now = timezone.make_aware(datetime(2026, 1, 5, 22, 0))
+
+    def make(self, name, **kw):
+        return FeaturedBusiness.objects.create(name=name, is_active=True, **kw)
+
+    def featured(self):
+        return set(FeaturedBusiness.objects.filter(_featured_now_q(self.now)).values_list("name", flat=True))
+
+    def test_hours(self):
+        self.make("day", open_time=time(9), close_time=time(17))
+        self.make("evening", open_time=time(18), close_time=time(23))
+        self.make("overnight", open_time=time(20), close_time=time(2))
+        self.make("late_morning", open_time=time(23), close_time=time(11))
+        self.assertEqual(self.featured(), {"evening", "overnight"})
+
+    def test_overnight_after_midnight(self):
+        self.make("overnight", open_time=time(20), close_time=time(2))
+        self.make("day", open_time=time(9), close_time=time(17))
+        self.now = timezone.make_aware(datetime(2026, 1, 6, 1, 30))
+        self.assertEqual(self.featured(), {"overnight"})
+
+    def test_promo_window_and_null_dates(self):
+        hours = {"open_time": time(20), "close_time": time(2)}
+        self.make("open_ended", **hours)
+        self.make("running", featured_from=self.now - timedelta(days=1), featured_until=self.now + timedelta(days=1), **hours)
+        self.make("lapsed", featured_until=self.now - timedelta(minutes=1), **hours)
+        self.make("not_started", featured_from=self.now + timedelta(minutes=1), **hours)
+        self.assertEqual(self.featured(), {"open_ended", "running"})
+
+    def test_holidays(self):
+        hours = {"open_time": time(20), "close_time": time(2)}
+        self.make("away", is_on_holiday=True, **hours)
+        self.make("away_until_tomorrow", is_on_holiday=True, holiday_until=self.now + timedelta(days=1), **hours)
+        self.make("back", is_on_holiday=True, holiday_until=self.now - timedelta(hours=1), **hours)
+        self.assertEqual(self.featured(), {"back"})
+
+
+class RaceOverpassTests(SimpleTestCase):
+    mirrors = ["https://a.example/api", "https://b.example/api"]
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(osm, "_ranked_mirrors", return_value=list(self.mirrors)),
+            mock.patch.object(osm, "OVERPASS_HEDGE_AFTER", 0.05),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def test_fails_over_when_first_mirror_errors(self):
+        def post(url, body, timeout):
+            if url == self.mirrors[0]:
+                raise osm.requests.ConnectionError("down")
+            return [{"id": 2}]
+
+        with mock.patch.object(osm, "_post_overpass", side_effect=post):
+            self.assertEqual(osm._race_overpass(b"q", 5), ([{"id": 2}], None))
+
+    def test_hedges_a_slow_mirror(self):
+        def post(url, body, timeout):
+            if url == self.mirrors[0]:
+                self.release.wait(5)
+                return [{"id": 1}]
+            return [{"id": 2}]
+
+        with mock.patch.object(osm, "_post_overpass", side_effect=post):
+            self.assertEqual(osm._race_overpass(b"q", 5), ([{"id": 2}], None))
+
+    def test_reports_last_error_when_every_mirror_fails(self):
+        with mock.patch.object(osm, "_post_overpass", side_effect=osm.requests.ConnectionError("down")):
+            elements, err = osm._race_overpass(b"q", 5)
+        self.assertEqual(elements, [])
+        self.assertIsInstance(err, osm.requests.ConnectionError)
+
+    def test_overall_deadline(self):
+        def post(url, body, timeout):
+            self.release.wait(5)
+            return [{"id": 1}]
+
+        with mock.patch.object(osm, "_post_overpass", side_effect=post):
+            elements, err = osm._race_overpass(b"q", 0.2)
+        self.assertEqual(elements, [])
+        self.assertIsInstance(err, osm.requests.Timeout)
+
+
+class _FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class NominatimPriorityTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        session = mock.Mock()
+        session.get.side_effect = self.fake_get
+        for patcher in (
+            mock.patch.object(osm, "_sess", return_value=session),
+            mock.patch.object(osm, "NOMINATIM_INTERVAL", 0.2),
+            mock.patch.object(osm, "NOMINATIM_MAX_WAIT", 0.45),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_get(self, url, params=None, **kwargs):
+        if url == osm.NOMINATIM_SEARCH_URL:
+            return _FakeResponse(b'[{"lat": "48.85", "lon": "2.35", "display_name": "Paris"}]')
+        return _FakeResponse(b'{"address": {"road": "Rue", "city": "Paris", "state": "IDF"}}')
+
+    def wait_for_warm_up(self):
+        osm._background_pool.submit(lambda: None).result()  # one worker: runs after the warm-up
+
+    def test_user_geocode_is_not_queued_behind_a_warm_up(self):
+        results = [
+            {"address": "", "city": "", "state": "", "zip_code": "", "lat": 48.0 + i / 100, "lon": 2.0}
+            for i in range(10)
+        ]
+        self.addCleanup(self.wait_for_warm_up)
+        self.assertTrue(osm.enrich_addresses_in_background(results))
+        clock.sleep(0.3)  # warm-up is now taking slots
+
+        started = clock.monotonic()
+        lat, lon, _, err = osm.geocode_location("Paris")
+        self.assertLess(clock.monotonic() - started, 0.45)
+        self.assertEqual((lat, lon, err), (48.85, 2.35, None))
+
+    def test_cached_only_enrichment_is_one_cache_round_trip(self):
+        osm.reverse_geocode(48.00001, 2.0)  # fills the cache for the rounded point
+        results = [
+            {"address": "", "city": "", "state": "", "zip_code": "", "lat": 48.0, "lon": 2.0},
+            {"address": "", "city": "", "state": "", "zip_code": "", "lat": 49.0, "lon": 2.0},
+        ]
+        with mock.patch.object(osm, "reverse_geocode", side_effect=AssertionError("per-point lookup")), \
+                mock.patch.object(osm.cache, "get_many", wraps=osm.cache.get_many) as get_many:
+            osm.enrich_addresses(results, cached_only=True)
+
+        get_many.assert_called_once()
+        self.assertEqual([r["city"] for r in results], ["Paris", ""])
+
+    def test_geocode_reports_busy_instead_of_waiting(self):
+        first = int(clock.time() / osm.NOMINATIM_INTERVAL) + 1
+        for slot in range(first, first + 10):
+            cache.add(f"osm:nominatim:slot:{slot}", 1)
+
+        self.assertEqual(osm.geocode_location("Paris"), (None, None, "", osm.NOMINATIM_BUSY))
+        self.assertIsNone(cache.get(osm._cache_key("geo", osm._norm_query("Paris"))))
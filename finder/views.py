@@ -1,33 +1,42 @@
 # finder/views.py
 import os
 import hashlib
-from datetime import datetime, timedelta
-from urllib.parse import quote_plus, urlparse
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from secrets import randbelow
+from types import MappingProxyType
+from urllib.parse import quote_plus
 import requests
 import stripe
-from dotenv import load_dotenv
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, F
+from django.db.models import F, Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_http_methods
+from django.core.cache import cache
 from django.core.mail import send_mail
 from django.views.decorators.http import require_GET
 
 
 from .forms import ManualBusinessForm, EditBusinessForm
-from .models import FeaturedBusiness, BusinessClaim
-from .services.osm import geocode_location, overpass_search
+from .models import FeaturedBusiness, BusinessClaim, address_parts
+from .services import click_counter
+from .services.osm import (
+    enrich_addresses,
+    enrich_addresses_in_background,
+    geocode_location,
+    overpass_search,
+)
 
  # for OSM claim flow
 
-load_dotenv()
-
 # -------------------------
 # Stripe
 # -------------------------
@@ -46,11 +55,15 @@ def env_str(v) -> str:
     return (v or "").strip()
 
 def _stars_for_rating(rating: float):
-    rating = float(rating or 0)
-    full = int(rating)
-    half = 1 if (rating - full) >= 0.5 else 0
+    # only whole half-steps matter, so there are ~11 distinct results
+    return _stars_for_half_steps(int(float(rating or 0) * 2))
+
+@lru_cache(maxsize=16)
+def _stars_for_half_steps(half_steps: int):
+    full, half = divmod(half_steps, 2)
     empty = 5 - full - half
-    return {"full": range(full), "half": bool(half), "empty": range(empty)}
+    # every caller shares the cached mapping, so hand out a read-only view
+    return MappingProxyType({"full": (None,) * full, "half": bool(half), "empty": (None,) * empty})
 
 def _build_display_location(*parts):
     cleaned = [str(p).strip() for p in parts if p and str(p).strip()]
@@ -60,86 +73,103 @@ def _google_maps_url(address: str, city: str = "", state: str = "", zip_code: st
     full = _build_display_location(address, city, state, zip_code)
     return f"https://www.google.com/maps/search/?api=1&query={quote_plus(full)}"
 
-def _db_address_parts(db_biz: FeaturedBusiness):
-    address = getattr(db_biz, "address", "") or ""
-    city = getattr(db_biz, "city", "") or ""
-    state = getattr(db_biz, "state", "") or ""
-    zip_code = getattr(db_biz, "zip_code", "") or ""
-
-    # fallback if only `location` is populated
-    if (not city and not state) and getattr(db_biz, "location", ""):
-        loc = db_biz.location or ""
-        if "," in loc:
-            a, b = loc.split(",", 1)
-            city = city or a.strip()
-            state = state or b.strip()
-        else:
-            city = city or loc.strip()
-
-    return address, city, state, zip_code
-
-def _is_open_now(open_time, close_time, now_time):
-    if not open_time or not close_time:
-        return False
-    if open_time <= close_time:
-        return open_time <= now_time <= close_time
-    return now_time >= open_time or now_time <= close_time
-
-def _business_available_now(biz: FeaturedBusiness, now_dt=None) -> bool:
-    now_dt = now_dt or timezone.localtime()
-    now_time = now_dt.time()
+def _location_q(location: str) -> Q:
+    """
+    "City, ST" -> exact city/state match (served by fb_city_state_idx).
+    Anything else falls back to substring matching across the address columns.
+    """
+    city, sep, state = location.partition(",")
+    city, state = city.strip(), state.strip()
+    if sep and city and state:
+        return Q(city__iexact=city, state__iexact=state) | Q(location__iexact=location)
+    return (
+        Q(location__icontains=location)
+        | Q(address__icontains=location)
+        | Q(city__icontains=location)
+        | Q(state__icontains=location)
+    )
 
-    # auto-clear expired holiday
-    if biz.is_on_holiday and biz.holiday_until and biz.holiday_until <= timezone.now():
-        biz.is_on_holiday = False
-        biz.holiday_until = None
-        biz.holiday_note = None
-        biz.save(update_fields=["is_on_holiday", "holiday_until", "holiday_note"])
+def _featured_now_q(now) -> Q:
+    """
+    SQL version of is_promoted_now() and is_open_now(): promo window covers
+    `now`, not on holiday (an expired holiday counts as over) and inside
+    open/close hours, including overnight hours like 8pm-2am.
+    """
+    nt = timezone.localtime(now).time()
+    promoted = (
+        (Q(featured_from__isnull=True) | Q(featured_from__lte=now))
+        & (Q(featured_until__isnull=True) | Q(featured_until__gte=now))
+    )
+    not_on_holiday = Q(is_on_holiday=False) | Q(holiday_until__lte=now)
+    open_now = (
+        (Q(open_time__lte=F("close_time")) & Q(open_time__lte=nt, close_time__gte=nt))
+        | (Q(open_time__gt=F("close_time")) & (Q(open_time__lte=nt) | Q(close_time__gte=nt)))
+    )
+    return promoted & not_on_holiday & open_now
 
-    if biz.is_on_holiday:
-        return False
-    
-    return _is_open_now(biz.open_time, biz.close_time, now_time)
+# At most one sweep per minute across all workers. A promo that lapses in
+# between is still hidden by _featured_now_q(); it just keeps its flag a bit longer.
+EXPIRE_PROMOTIONS_EVERY = 60
 
 def _expire_promotions():
-    qs = FeaturedBusiness.objects.filter(is_active=True).only("id", "featured_until", "is_active", "priority")
-    for biz in qs:
-        biz.deactivate_if_expired()
-
-def _manual_to_payload(m: FeaturedBusiness):
-    addr, city, state, zip_code = _db_address_parts(m)
-    display_location = _build_display_location(addr, city, state, zip_code) or (m.location or "")
+    if not cache.add("promos_last_expired", 1, EXPIRE_PROMOTIONS_EVERY):
+        return
+    FeaturedBusiness.expire_promotions()
+    FeaturedBusiness.clear_expired_holidays()
+
+# columns _manual_to_payload reads; manual search rows are fetched as plain dicts
+MANUAL_PAYLOAD_FIELDS = (
+    "id", "yelp_id", "name", "address", "city", "state", "zip_code", "location",
+    "phone", "url", "image_url", "rating", "review_count", "is_active", "plan",
+    "featured_until", "owner_id", "open_time", "close_time",
+    "is_on_holiday", "holiday_note", "holiday_until",
+)
+
+# columns the featured cards on the search page render
+FEATURED_CARD_FIELDS = (
+    "id", "name", "plan", "is_on_holiday", "address", "city", "state", "zip_code",
+    "open_time", "close_time",
+)
+
+def _manual_to_payload(m: dict):
+    """m: a FeaturedBusiness row from .values(*MANUAL_PAYLOAD_FIELDS)."""
+    addr, city, state, zip_code = address_parts(m["address"], m["city"], m["state"], m["zip_code"], m["location"])
+    display_location = _build_display_location(addr, city, state, zip_code) or (m["location"] or "")
     maps_url = _google_maps_url(addr, city, state, zip_code)
 
     return {
-        "db_id": m.id,
-        "id": m.yelp_id or f"manual_{m.id}",
-        "name": m.name,
+        "db_id": m["id"],
+        "id": m["yelp_id"] or f"manual_{m['id']}",
+        "name": m["name"],
         "address": addr,
         "city": city,
         "state": state,
         "zip_code": zip_code,
         "display_location": display_location,
         "maps_url": maps_url,
-        "display_phone": m.phone or "",
-        "url": m.url or "",
-        "image_url": getattr(m, "image_url", "") or "",
-        "rating": m.rating or 0,
-        "review_count": m.review_count or 0,
-        "featured": bool(m.is_active),
-        "plan": m.plan,
-        "featured_until": m.featured_until,
-        "owner_id": m.owner_id,
-        "open_time": m.open_time,
-        "close_time": m.close_time,
-        "is_on_holiday": m.is_on_holiday,
-        "holiday_note": m.holiday_note,
-        "holiday_until": m.holiday_until,
-        "stars": _stars_for_rating(m.rating or 0),
+        "display_phone": m["phone"] or "",
+        "url": m["url"] or "",
+        "image_url": m["image_url"] or "",
+        "rating": m["rating"] or 0,
+        "review_count": m["review_count"] or 0,
+        "featured": bool(m["is_active"]),
+        "plan": m["plan"],
+        "featured_until": m["featured_until"],
+        "owner_id": m["owner_id"],
+        "open_time": m["open_time"],
+        "close_time": m["close_time"],
+        "is_on_holiday": m["is_on_holiday"],
+        "holiday_note": m["holiday_note"],
+        "holiday_until": m["holiday_until"],
+        "stars": _stars_for_rating(m["rating"] or 0),
         "source": "manual",
     }
 
-def _osm_to_payload(item: dict):
+def _osm_to_payload(item: dict, db_map=None):
+    """
+    db_map: {external_key: FeaturedBusiness} from one batched lookup (see
+    search_business); without it the row is looked up on its own.
+    """
     name = item.get("name") or "Unknown business"
     address = item.get("address") or ""
     city = item.get("city") or ""
@@ -158,11 +188,14 @@ def _osm_to_payload(item: dict):
     # ✅ if this OSM place is already imported into DB, attach it
     db = None
     if external_key:
-        db = FeaturedBusiness.objects.filter(yelp_id=external_key).first()
+        if db_map is not None:
+            db = db_map.get(external_key)
+        else:
+            db = FeaturedBusiness.objects.filter(yelp_id=external_key).first()
 
     payload = {
         "db_id": db.id if db else None,
-        "id": osm_id or hashlib.md5(f"{name}{display_location}".encode()).hexdigest(),
+        "id": osm_id or hashlib.blake2b(f"{name}|{display_location}".encode(), digest_size=8).hexdigest(),
         "osm_id": osm_id,
         "external_key": external_key,
 
@@ -211,14 +244,14 @@ from django.db.models import Q
 from django.utils import timezone
 import requests
 
+_geocode_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-geocode")
+
 @require_http_methods(["GET", "POST"])
 def search_business(request):
     error = None
     businesses = []
     featured = []
 
-    _expire_promotions()
-
     # -------------------------
     # Read inputs (POST or GET)
     # -------------------------
@@ -235,16 +268,19 @@ def search_business(request):
     # Run search
     # -------------------------
     if term and location:
+        _expire_promotions()
+
+        # Geocoding is pure network wait: start it now and run the manual DB
+        # query on this thread meanwhile (DB work stays on the request thread
+        # and its connection).
+        geo_future = _geocode_pool.submit(geocode_location, location)
+
         # 1) Manual businesses first (your DB)
         manual_qs = (
             FeaturedBusiness.objects.filter(is_manual=True)
             .filter(Q(category__icontains=term) | Q(name__icontains=term))
-            .filter(
-                Q(location__icontains=location)
-                | Q(address__icontains=location)
-                | Q(city__icontains=location)
-                | Q(state__icontains=location)
-            )
+            .filter(_location_q(location))
+            .values(*MANUAL_PAYLOAD_FIELDS)
         )
 
         manual_payloads = []
@@ -252,12 +288,8 @@ def search_business(request):
             p = _manual_to_payload(m)
 
             # fields your template uses (upgrade/claim UI)
-            p["db_id"] = m.id
-            p["owner_id"] = m.owner_id
-            p["is_active"] = bool(m.is_active)
-            p["featured"] = bool(m.is_active)
-            p["plan"] = m.plan
-            p["is_on_holiday"] = bool(m.is_on_holiday)
+            p["is_active"] = bool(m["is_active"])
+            p["is_on_holiday"] = bool(m["is_on_holiday"])
 
             manual_payloads.append(p)
 
@@ -265,7 +297,7 @@ def search_business(request):
         osm_payloads = []
 
         # ✅ your geocoder now returns 4 values ALWAYS
-        lat, lon, geo_display, geo_err = geocode_location(location)
+        lat, lon, geo_display, geo_err = geo_future.result()
 
         if geo_err:
             error = f"Location error: {geo_err}"
@@ -280,9 +312,25 @@ def search_business(request):
                 if not osm_results:
                     osm_results = overpass_search(term, lat, lon, radius_m=20000, limit=60)
 
+                # Addresses: use whatever reverse lookups are already cached and
+                # fetch the rest in the background so the page isn't held up
+                enrich_addresses(osm_results, cached_only=True)
+                enrich_addresses_in_background(osm_results)
+
+                # one query for every already-imported place instead of one per result
+                keys = [f"osm:{x.get('osm_id') or x.get('id')}" for x in osm_results if (x.get("osm_id") or x.get("id"))]
+                # (a dict, not in_bulk(): yelp_id's uniqueness is a partial constraint;
+                # order_by() drops Meta.ordering, there's nothing to sort)
+                db_map = {
+                    b.yelp_id: b
+                    for b in FeaturedBusiness.objects.filter(yelp_id__in=keys)
+                    .only("id", "yelp_id", "is_active", "plan", "featured_until", "owner_id")
+                    .order_by()
+                } if keys else {}
+
                 osm_payloads = []
                 for x in (osm_results or []):
-                    p = _osm_to_payload(x)
+                    p = _osm_to_payload(x, db_map)
                     p["osm_id"] = x.get("osm_id") or x.get("id")  # ensure present
                     p["category"] = term  # helps save category when importing into DB
                     osm_payloads.append(p)
@@ -303,17 +351,13 @@ def search_business(request):
         featured_qs = (
             FeaturedBusiness.objects.filter(is_active=True)
             .filter(Q(name__icontains=term) | Q(category__icontains=term))
-            .filter(Q(location__icontains=location) | Q(city__icontains=location) | Q(state__icontains=location))
+            .filter(_location_q(location))
+            # only show if promo window is valid AND business is open
+            .filter(_featured_now_q(timezone.now()))
             .order_by("-priority", "-featured_until")
+            .only(*FEATURED_CARD_FIELDS)
         )
-
-        now = timezone.now()
-        featured_list = []
-        for biz in featured_qs[:50]:
-            # only show if promo window is valid AND business is open (your function)
-            if biz.is_promoted_now() and _business_available_now(biz):
-                featured_list.append(biz)
-        featured = featured_list[:5]
+        featured = list(featured_qs[:5])
 
     elif request.method == "POST":
         error = "Please provide both business type and location."
@@ -362,31 +406,30 @@ def import_osm_business(request):
     url = env_str(request.GET.get("url"))
     category = env_str(request.GET.get("category"))  # optional (we can set it to search term)
 
-    # if already exists, just go to details
-    existing = FeaturedBusiness.objects.filter(yelp_id=external_key).first()
-    if existing:
-        return redirect("business_detail", business_id=existing.id)
-
-    # Create as “manual/imported” so it behaves like your DB businesses
-    biz = FeaturedBusiness.objects.create(
-        name=name or "Imported business",
-        category=category,
-        location=_build_display_location(city, state) if (city or state) else "",
-        address=address,
-        city=city,
-        state=state,
-        zip_code=zip_code,
-        phone=phone or None,
-        url=url or None,
-
-        is_manual=True,           # treat as DB business
+    # if already exists, just go to details; otherwise create it as
+    # “manual/imported” so it behaves like your DB businesses
+    biz, created = FeaturedBusiness.objects.get_or_create(
         yelp_id=external_key,     # reuse field as external id
-        is_active=False,
-        plan=FeaturedBusiness.PLAN_FEATURED,
-        priority=0,
+        defaults={
+            "name": name or "Imported business",
+            "category": category,
+            "location": _build_display_location(city, state) if (city or state) else "",
+            "address": address,
+            "city": city,
+            "state": state,
+            "zip_code": zip_code,
+            "phone": phone or None,
+            "url": url or None,
+
+            "is_manual": True,    # treat as DB business
+            "is_active": False,
+            "plan": FeaturedBusiness.PLAN_FEATURED,
+            "priority": 0,
+        },
     )
 
-    messages.success(request, "Business imported. You can now claim it (add website if missing) and promote it.")
+    if created:
+        messages.success(request, "Business imported. You can now claim it (add website if missing) and promote it.")
     return redirect("business_detail", business_id=biz.id)
 
         # 3) featured list (from your DB)
@@ -416,10 +459,11 @@ def business_detail(request, business_id):
     biz = get_object_or_404(FeaturedBusiness, id=business_id)
 
     if hasattr(biz, "views_count"):
-        FeaturedBusiness.objects.filter(id=biz.id).update(views_count=F("views_count") + 1)
-        biz.refresh_from_db()
+        FeaturedBusiness.bump(biz.id, "views_count")
+        # mirror the UPDATE locally instead of re-reading the whole row
+        biz.views_count = (biz.views_count or 0) + 1
 
-    addr, city, state, zip_code = _db_address_parts(biz)
+    addr, city, state, zip_code = biz.resolved_address
     maps_url = _google_maps_url(addr, city, state, zip_code)
 
     return render(request, "finder/business_detail.html", {
@@ -477,102 +521,28 @@ def toggle_holiday(request, business_id):
 # -------------------------
 # Claim flow (OTP email)
 # -------------------------
-def _domain_from_url(url: str) -> str:
-    if not url:
-        return ""
-    try:
-        host = urlparse(url).netloc.lower()
-        return host.replace("www.", "")
-    except Exception:
-        return ""
-
 def _gen_code() -> str:
-    import random
-    return f"{random.randint(100000, 999999)}"
+    return f"{100000 + randbelow(900000):06d}"
 
 def _hash_code(code: str) -> str:
-    import hashlib
-    return hashlib.sha256(code.encode()).hexdigest()
+    return BusinessClaim.hash_code(code)
 
 
 
 
 
 
-@login_required
-@require_POST
-def claim_osm_start(request):
-    """
-    Takes an OSM result from the search page (POST),
-    creates/gets a DB Business row, then redirects to your existing claim flow.
-    """
-
-    osm_id = (request.POST.get("osm_id") or "").strip()
-    name = (request.POST.get("name") or "").strip()
-
-    address = (request.POST.get("address") or "").strip()
-    city = (request.POST.get("city") or "").strip()
-    state = (request.POST.get("state") or "").strip()
-    zip_code = (request.POST.get("zip_code") or "").strip()
-
-    phone = (request.POST.get("phone") or "").strip()
-    url = (request.POST.get("url") or "").strip()
-    category = (request.POST.get("category") or "").strip()
-
-    # Safety: must have at least name + osm_id (or name alone)
-    if not name:
-        return redirect("finder")  # change to your search page url name if different
-
-    # ✅ Create/get the business in your DB
-    # IMPORTANT: adapt fields to YOUR model fields
-    biz, created = FeaturedBusiness.objects.get_or_create(
-        osm_id=osm_id,              # if your model doesn't have osm_id, remove this line
-        defaults={
-            "name": name,
-            "address": address,
-            "city": city,
-            "state": state,
-            "zip_code": zip_code,
-            "phone": phone,
-            "url": url,
-            "category": category,
-        }
-    )
-
-    # If it already exists, update missing fields (optional but helpful)
-    changed = False
-    for field, value in {
-        "name": name,
-        "address": address,
-        "city": city,
-        "state": state,
-        "zip_code": zip_code,
-        "phone": phone,
-        "url": url,
-        "category": category,
-    }.items():
-        if hasattr(biz, field) and value and not getattr(biz, field):
-            setattr(biz, field, value)
-            changed = True
-    if changed:
-        biz.save()
-
-    # ✅ Send them into your existing "claim" flow for DB businesses
-    # If your claim url name is different, change it here:
-    return redirect("claim_request", biz.id)
-
-
-
 @login_required
 @require_http_methods(["GET", "POST"])
 def claim_request(request, business_id):
     biz = get_object_or_404(FeaturedBusiness, id=business_id)
 
-    if biz.owner and biz.owner != request.user:
+    # compare ids: dereferencing biz.owner would be another query
+    if biz.owner_id and biz.owner_id != request.user.id:
         messages.error(request, "This business is already claimed.")
         return redirect("search_business")
 
-    website_domain = _domain_from_url(biz.url)
+    website_domain = biz.website_domain()
 
     if request.method == "POST":
         email = (request.POST.get("email") or "").strip().lower()
@@ -629,7 +599,7 @@ def claim_request(request, business_id):
 @login_required
 @require_http_methods(["GET", "POST"])
 def claim_verify(request, claim_id):
-    claim = get_object_or_404(BusinessClaim, id=claim_id, user=request.user)
+    claim = get_object_or_404(BusinessClaim.objects.select_related("business"), id=claim_id, user=request.user)
     biz = claim.business
 
     if claim.verified_at is not None:
@@ -649,7 +619,7 @@ def claim_verify(request, claim_id):
             messages.error(request, "Too many attempts. Request a new code.")
             return redirect("claim_request", business_id=biz.id)
 
-        if _hash_code(code) != claim.code_hash:
+        if not hmac.compare_digest(_hash_code(code), claim.code_hash):
             messages.error(request, "Invalid code.")
             return redirect(request.path)
 
@@ -657,7 +627,7 @@ def claim_verify(request, claim_id):
         claim.save(update_fields=["verified_at"])
 
         # assign owner
-        if not biz.owner:
+        if not biz.owner_id:
             biz.owner = request.user
             biz.save(update_fields=["owner"])
 
@@ -697,47 +667,34 @@ def claim_osm_start(request):
     location = ", ".join([x for x in [city, state] if x])
 
     # Use yelp_id field to store OSM id to avoid adding a new DB column
-    # (yelp_id is unique, so it works well as external_id)
-    biz, created = FeaturedBusiness.objects.get_or_create(
-        yelp_id=osm_id,
-        defaults={
+    # (yelp_id is unique, so it works well as external_id).
+    # Existing rows only take the non-empty values; new rows get the full set.
+    updates = {
+        k: v for k, v in {
             "name": name,
             "category": category,
-            "is_manual": False,      # important: this is NOT user-added manually
-            "owner": None,
-            "is_active": False,
-            "priority": 0,
-            "plan": FeaturedBusiness.PLAN_FEATURED,
             "location": location,
             "address": address,
             "city": city,
             "state": state,
             "zip_code": zip_code,
-            "phone": phone or None,
-            "url": url or None,
+            "phone": phone,
+            "url": url,
+        }.items() if v
+    }
+    biz, created = FeaturedBusiness.objects.update_or_create(
+        yelp_id=osm_id,
+        defaults=updates,
+        create_defaults={
+            **updates,
+            "is_manual": False,      # important: this is NOT user-added manually
+            "owner": None,
+            "is_active": False,
+            "priority": 0,
+            "plan": FeaturedBusiness.PLAN_FEATURED,
         },
     )
 
-    # Update missing fields if the record already existed
-    changed = False
-    for field, value in [
-        ("name", name),
-        ("category", category),
-        ("location", location),
-        ("address", address),
-        ("city", city),
-        ("state", state),
-        ("zip_code", zip_code),
-        ("phone", phone or None),
-        ("url", url or None),
-    ]:
-        if value and getattr(biz, field) != value:
-            setattr(biz, field, value)
-            changed = True
-
-    if changed:
-        biz.save()
-
     return redirect("claim_request", business_id=biz.id)
 
 
@@ -748,7 +705,7 @@ def claim_osm_start(request):
 def create_checkout_session(request, business_id, plan):
     business = get_object_or_404(FeaturedBusiness, id=business_id)
 
-    if business.owner != request.user:
+    if business.owner_id != request.user.id:
         return JsonResponse({"error": "Claim this business before promoting."}, status=403)
 
     plan = (plan or "").lower().strip()
@@ -779,33 +736,43 @@ def create_checkout_session(request, business_id, plan):
 def track_view(request, business_id):
     if not hasattr(FeaturedBusiness, "views_count"):
         return JsonResponse({"ok": False, "error": "Analytics not enabled"}, status=400)
-    FeaturedBusiness.objects.filter(id=business_id).update(views_count=F("views_count") + 1)
+    click_counter.bump("views_count", business_id)
     return JsonResponse({"ok": True})
 
 @require_POST
 def track_call(request, business_id):
     if not hasattr(FeaturedBusiness, "call_clicks"):
         return JsonResponse({"ok": False, "error": "Analytics not enabled"}, status=400)
-    FeaturedBusiness.objects.filter(id=business_id).update(call_clicks=F("call_clicks") + 1)
+    click_counter.bump("call_clicks", business_id)
     return JsonResponse({"ok": True})
 
 @require_POST
 def track_web(request, business_id):
     if not hasattr(FeaturedBusiness, "website_clicks"):
         return JsonResponse({"ok": False, "error": "Analytics not enabled"}, status=400)
-    FeaturedBusiness.objects.filter(id=business_id).update(website_clicks=F("website_clicks") + 1)
+    click_counter.bump("website_clicks", business_id)
     return JsonResponse({"ok": True})
 
 @require_POST
 def track_dir(request, business_id):
     if not hasattr(FeaturedBusiness, "directions_clicks"):
         return JsonResponse({"ok": False, "error": "Analytics not enabled"}, status=400)
-    FeaturedBusiness.objects.filter(id=business_id).update(directions_clicks=F("directions_clicks") + 1)
+    click_counter.bump("directions_clicks", business_id)
     return JsonResponse({"ok": True})
 
 # -------------------------
 # Stripe webhook
 # -------------------------
+def _subscription_period_end(sub):
+    # newer API versions moved current_period_end from the subscription to its items
+    items = (sub.get("items") or {}).get("data") or []
+    return sub.get("current_period_end") or max((i.get("current_period_end") or 0 for i in items), default=0) or None
+
+def _invoice_period_end(invoice):
+    # invoice line periods carry the subscription's current period end
+    lines = (invoice.get("lines") or {}).get("data") or []
+    return max(((line.get("period") or {}).get("end") or 0 for line in lines), default=0) or None
+
 @csrf_exempt
 def stripe_webhook(request):
     payload = request.body
@@ -823,13 +790,16 @@ def stripe_webhook(request):
     event_type = event["type"]
     obj = event["data"]["object"]
 
-    def apply_subscription_to_business(biz: FeaturedBusiness, subscription_id: str, plan: str, amount_cents: int = 0):
-        sub = stripe.Subscription.retrieve(subscription_id)
-        period_end = sub.get("current_period_end")
-        biz.featured_from = timezone.now()
+    def apply_subscription_to_business(biz: FeaturedBusiness, subscription_id: str, plan: str, amount_cents: int = 0, period_end=None):
+        # invoice.paid carries the period end; only checkout needs the Stripe lookup.
+        # Never activate without an end date: a failure here is a 500, so Stripe retries.
+        if not period_end:
+            period_end = _subscription_period_end(stripe.Subscription.retrieve(subscription_id))
+        if not period_end:
+            raise ValueError(f"Subscription {subscription_id} has no current period end")
 
-        if period_end:
-            biz.featured_until = datetime.fromtimestamp(period_end, tz=timezone.utc)
+        biz.featured_from = timezone.now()
+        biz.featured_until = datetime.fromtimestamp(period_end, tz=dt_timezone.utc)
 
         biz.plan = plan
         biz.stripe_subscription_id = subscription_id
@@ -862,7 +832,7 @@ def stripe_webhook(request):
         if subscription_id:
             biz = FeaturedBusiness.objects.filter(stripe_subscription_id=subscription_id).first()
             if biz:
-                apply_subscription_to_business(biz, subscription_id, biz.plan, amount_paid)
+                apply_subscription_to_business(biz, subscription_id, biz.plan, amount_paid, _invoice_period_end(obj))
 
     elif event_type == "customer.subscription.deleted":
         subscription_id = obj.get("id")